@@ -3,17 +3,36 @@
 GitHub Actions workflow script for podcast generation
 Handles URL processing, podcast generation, and Cloudflare R2 upload
 """
+import atexit
+import functools
+import mimetypes
 import os
 import sys
-import glob
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
+from urllib.parse import quote
 import pytz
-import boto3
-from botocore.config import Config
-from podcastfy.client import generate_podcast
-from podcastfy.utils.config_conversation import load_conversation_config
+
+from workflow_utils import find_latest_file
+
+# boto3 and podcastfy are imported lazily so runs that exit early
+# (no URLs to process) don't pay for loading them.
+
+R2_ENDPOINT_URL = "https://2d797e9348660f2d5a228739b19cd956.r2.cloudflarestorage.com"
+
+# R2 requires every multipart part except the last to be the same size,
+# so threshold and chunk size are pinned to the same fixed value.
+R2_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+R2_MULTIPART_MAX_CONCURRENCY = 16
+# Files below this size (transcripts, timelines) are sent with a plain put_object
+R2_SINGLE_PUT_MAX_SIZE = 5 * 1024 * 1024
+# Content types for the files the workflow uploads; others fall back to mimetypes
+R2_CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.txt': 'text/plain',
+}
 
 
 def load_urls_from_file(filepath: str) -> List[str]:
@@ -43,40 +62,81 @@ def parse_urls_input(urls_input: str) -> List[str]:
     return [url.strip() for url in urls_input.split(',') if url.strip()]
 
 
-def upload_to_r2(
-    file_path: str,
-    bucket_name: str = "daily-podcast",
-    endpoint_url: str = "https://2d797e9348660f2d5a228739b19cd956.r2.cloudflarestorage.com",
-    timestamp: Optional[str] = None
-) -> Optional[str]:
-    """Upload a file to Cloudflare R2 and return the public URL."""
+@functools.lru_cache(maxsize=1)
+def _get_r2_client(endpoint_url: str):
+    """Create the R2 S3 client once and reuse it (and its connection pool) across uploads."""
     # For testing, use hardcoded values (will be moved to secrets later)
     access_key_id = os.environ.get('R2_ACCESS_KEY_ID', '')
     secret_access_key = os.environ.get('R2_SECRET_ACCESS_KEY', '')
     
     if not access_key_id or not secret_access_key:
-        print("⚠️  R2 credentials not set. Skipping R2 upload.")
+        return None
+    
+    import boto3
+    from botocore.config import Config
+    
+    # Configure boto3 for R2
+    s3_config = Config(
+        signature_version='s3v4',
+        region_name='auto',
+        max_pool_connections=32,
+        retries={'mode': 'adaptive', 'max_attempts': 5}
+    )
+    
+    # Use a dedicated session; the default boto3 session is not thread-safe
+    return boto3.session.Session().client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=secret_access_key,
+        config=s3_config
+    )
+
+
+def _r2_object_has_size(
+    s3_client,
+    bucket_name: str,
+    file_key: str,
+    size: int,
+    log: Callable[[str], None] = print
+) -> bool:
+    """Check whether an object with the given key and byte size already exists in R2."""
+    from botocore.exceptions import ClientError
+    
+    try:
+        meta = s3_client.head_object(Bucket=bucket_name, Key=file_key)
+    except ClientError as e:
+        error_code = e.response.get('Error', {}).get('Code')
+        if error_code not in ('404', 'NoSuchKey', 'NotFound'):
+            # e.g. a write-only token; just fall back to uploading
+            log(f"⚠️  Could not check existing R2 object ({error_code}), uploading anyway")
+        return False
+    return meta.get('ContentLength') == size
+
+
+def upload_to_r2(
+    file_path: str,
+    bucket_name: str = "daily-podcast",
+    endpoint_url: str = R2_ENDPOINT_URL,
+    timestamp: Optional[str] = None,
+    log: Callable[[str], None] = print
+) -> Optional[str]:
+    """
+    Upload a file to Cloudflare R2 and return the public URL.
+    
+    Progress messages go through ``log``, so concurrent callers can collect
+    them per file instead of interleaving them on stdout. Callers are
+    expected to check for R2 credentials first (see main()).
+    """
+    s3_client = _get_r2_client(endpoint_url)
+    if s3_client is None:
         return None
     
     if not os.path.exists(file_path):
-        print(f"File not found: {file_path}")
+        log(f"File not found: {file_path}")
         return None
     
     try:
-        # Configure boto3 for R2
-        s3_config = Config(
-            signature_version='s3v4',
-            region_name='auto'
-        )
-        
-        s3_client = boto3.client(
-            's3',
-            endpoint_url=endpoint_url,
-            aws_access_key_id=access_key_id,
-            aws_secret_access_key=secret_access_key,
-            config=s3_config
-        )
-        
         # Prepare file key (URL encode if needed)
         filename = Path(file_path).name
         if timestamp:
@@ -84,31 +144,57 @@ def upload_to_r2(
         else:
             file_key = filename
         
-        # URL encode file key for public URL
-        from urllib.parse import quote
-        encoded_file_key = quote(file_key, safe='')
+        # URL encode file key for public URL (timestamped names are usually already safe)
+        if file_key.isascii() and all(c.isalnum() or c in '._-' for c in file_key):
+            encoded_file_key = file_key
+        else:
+            encoded_file_key = quote(file_key, safe='')
         
         # Determine content type
-        content_type = 'application/octet-stream'
-        if filename.endswith('.mp3'):
-            content_type = 'audio/mpeg'
-        elif filename.endswith('.txt'):
-            content_type = 'text/plain'
-        
-        # Upload file
-        s3_client.upload_file(
-            file_path,
-            bucket_name,
-            file_key,
-            ExtraArgs={'ContentType': content_type}
+        ext = os.path.splitext(filename)[1].lower()
+        content_type = (
+            R2_CONTENT_TYPES.get(ext)
+            or mimetypes.guess_type(filename)[0]
+            or 'application/octet-stream'
         )
         
+        # Upload file (small files skip the transfer manager entirely)
+        file_size = os.path.getsize(file_path)
+        skipped = False
+        if file_size < R2_SINGLE_PUT_MAX_SIZE:
+            with open(file_path, 'rb') as f:
+                s3_client.put_object(
+                    Bucket=bucket_name,
+                    Key=file_key,
+                    Body=f,
+                    ContentType=content_type
+                )
+        elif _r2_object_has_size(s3_client, bucket_name, file_key, file_size, log):
+            # Same key and size already in R2 (e.g. a retried run): skip the transfer
+            log(f"⏭️  Already in R2 with the same size, skipping upload: {file_key}")
+            skipped = True
+        else:
+            from boto3.s3.transfer import TransferConfig
+            transfer_config = TransferConfig(
+                multipart_threshold=R2_MULTIPART_CHUNK_SIZE,
+                multipart_chunksize=R2_MULTIPART_CHUNK_SIZE,
+                max_concurrency=R2_MULTIPART_MAX_CONCURRENCY,
+                use_threads=True
+            )
+            s3_client.upload_file(
+                file_path,
+                bucket_name,
+                file_key,
+                ExtraArgs={'ContentType': content_type},
+                Config=transfer_config
+            )
+        
         # Construct public URL
         # Option 1: Use custom domain if provided
         custom_domain = os.environ.get('R2_CUSTOM_DOMAIN', '')
         if custom_domain:
             public_url = f"{custom_domain.rstrip('/')}/{bucket_name}/{encoded_file_key}"
-            print(f"✅ Using custom domain: {custom_domain}")
+            log(f"✅ Using custom domain: {custom_domain}")
         else:
             # Option 2: Use R2.dev subdomain (if public access is enabled)
             # Get R2.dev subdomain from environment variable or construct from endpoint
@@ -117,33 +203,35 @@ def upload_to_r2(
                 # Use provided R2.dev subdomain
                 # R2.dev subdomain uses file key directly without bucket name
                 public_url = f"{r2_dev_subdomain.rstrip('/')}/{encoded_file_key}"
-                print(f"✅ Using R2.dev subdomain: {r2_dev_subdomain}")
+                log(f"✅ Using R2.dev subdomain: {r2_dev_subdomain}")
             else:
                 # Fallback: Try to construct from endpoint (may not work)
                 account_id = endpoint_url.split('//')[1].split('.')[0]
                 # R2.dev subdomain uses file key directly without bucket name
                 public_url = f"https://{bucket_name}.{account_id}.r2.dev/{encoded_file_key}"
-                print(f"⚠️  Using constructed R2.dev subdomain (set R2_DEV_SUBDOMAIN for better results)")
+                log(f"⚠️  Using constructed R2.dev subdomain (set R2_DEV_SUBDOMAIN for better results)")
         
-        print(f"✅ Successfully uploaded to R2: {file_key}")
-        print(f"📎 Bucket: {bucket_name}")
-        print(f"📎 Public URL: {public_url}")
+        if not skipped:
+            log(f"✅ Successfully uploaded to R2: {file_key}")
+        log(f"📎 Bucket: {bucket_name}")
+        log(f"📎 Public URL: {public_url}")
         
         return public_url
     except Exception as e:
-        print(f"❌ Error uploading to R2: {str(e)}")
+        log(f"❌ Error uploading to R2: {str(e)}")
         import traceback
-        traceback.print_exc()
+        log(traceback.format_exc().rstrip())
         return None
 
 
-def find_latest_file(pattern: str) -> Optional[str]:
-    """Find the most recently created file matching the pattern."""
-    # Try both with and without ./ prefix
-    files = glob.glob(pattern) + glob.glob(f"./{pattern}")
-    # Remove duplicates
-    files = list(set(files))
-    return max(files, key=os.path.getmtime) if files else None
+def _upload_to_r2_with_log(
+    file_path: str,
+    timestamp: Optional[str]
+) -> Tuple[Optional[str], List[str]]:
+    """Run upload_to_r2 from a worker thread, returning its URL and log lines."""
+    lines: List[str] = []
+    public_url = upload_to_r2(file_path, timestamp=timestamp, log=lines.append)
+    return public_url, lines
 
 
 def extract_date_str(timestamp: str) -> Optional[str]:
@@ -165,29 +253,31 @@ def find_transcript_files(date_str: Optional[str] = None) -> Tuple[Optional[str]
     Returns:
         Tuple of (transcript_file, timeline_file)
     """
-    transcript_pattern = "data/transcripts/transcript_*.txt"
-    timeline_pattern = "data/transcripts/timeline_*.txt"
-    
-    transcript_files = glob.glob(transcript_pattern)
-    timeline_files = glob.glob(timeline_pattern)
-    
-    # Filter by date if provided
-    if date_str:
-        transcript_files = [f for f in transcript_files if date_str in f]
-        timeline_files = [f for f in timeline_files if date_str in f]
-    
-    transcript_file = max(transcript_files, key=os.path.getmtime) if transcript_files else None
-    timeline_file = max(timeline_files, key=os.path.getmtime) if timeline_files else None
+    transcript_file = find_latest_file("data/transcripts/transcript_*.txt", contains=date_str)
+    timeline_file = find_latest_file("data/transcripts/timeline_*.txt", contains=date_str)
     
     return transcript_file, timeline_file
 
 
+# GitHub Actions outputs are buffered here and written in one go at exit
+_outputs: Dict[str, str] = {}
+
+
 def write_github_output(key: str, value: str):
-    """Write to GitHub Actions output file."""
+    """Record a GitHub Actions output; written to GITHUB_OUTPUT at exit."""
+    _outputs[key] = value
+
+
+def _flush_outputs():
+    """Write all recorded outputs to the GitHub Actions output file in a single open."""
     github_output = os.environ.get('GITHUB_OUTPUT')
-    if github_output:
+    if github_output and _outputs:
         with open(github_output, 'a') as f:
-            f.write(f"{key}={value}\n")
+            f.write("".join(f"{key}={value}\n" for key, value in _outputs.items()))
+    _outputs.clear()
+
+
+atexit.register(_flush_outputs)
 
 
 def main():
@@ -215,15 +305,22 @@ def main():
         print("❌ No URLs provided. Skipping generation.")
         sys.exit(0)
     
-    # Load config
+    from podcastfy.client import generate_podcast
+    from podcastfy.utils.config_conversation import load_conversation_config
+    
+    # Load config once and keep the values we need in locals
     try:
-        conv_config = load_conversation_config()
-        config_dict = conv_config.to_dict()
-        default_tts = config_dict.get("text_to_speech", {}).get("default_tts_model", "elevenlabs")
-        print(f"📋 Using config from conversation_config.yaml:")
-        print(f"   - TTS Model: {default_tts}")
-        print(f"   - Max Chunks: {config_dict.get('max_num_chunks', 4)}")
-        print(f"   - Min Chunk Size: {config_dict.get('min_chunk_size', 2000)}")
+        config_dict = load_conversation_config().to_dict()
+        tts_config = config_dict.get("text_to_speech", {})
+        default_tts = tts_config.get("default_tts_model", "elevenlabs")
+        max_chunks = config_dict.get("max_num_chunks", 4)
+        min_chunk_size = config_dict.get("min_chunk_size", 2000)
+        print(
+            f"📋 Using config from conversation_config.yaml:\n"
+            f"   - TTS Model: {default_tts}\n"
+            f"   - Max Chunks: {max_chunks}\n"
+            f"   - Min Chunk Size: {min_chunk_size}"
+        )
     except Exception as e:
         print(f"⚠️  Warning: Could not load config file, using defaults: {e}")
         default_tts = "elevenlabs"
@@ -251,25 +348,40 @@ def main():
         print(f"✅ Podcast generated successfully: {result}")
         write_github_output("audio_file", result)
         
-        # Upload audio to R2
-        r2_url = upload_to_r2(result, timestamp=timestamp)
-        if r2_url:
-            write_github_output("r2_url", r2_url)
+        # Resolve the shared R2 client once, before any worker thread needs it
+        if _get_r2_client(R2_ENDPOINT_URL) is None:
+            print("⚠️  R2 credentials not set. Skipping R2 upload.")
         else:
-            print("⚠️  R2 upload failed or skipped, but continuing...")
-        
-        # Upload transcript to R2
-        transcript_file = find_latest_file("data/transcripts/transcript_*.txt")
-        if transcript_file:
-            print(f"📄 Uploading transcript: {transcript_file}")
-            upload_to_r2(transcript_file, timestamp=timestamp)
-        
-        # Upload timeline file to R2
-        timeline_file = find_latest_file("data/transcripts/timeline_*.txt")
-        if timeline_file:
-            print(f"📊 Uploading timeline: {timeline_file}")
-            upload_to_r2(timeline_file, timestamp=timestamp)
-        
+            # Collect audio, transcript and timeline files for upload
+            upload_files = [result]
+
+            transcript_file = find_latest_file("data/transcripts/transcript_*.txt")
+            if transcript_file:
+                print(f"📄 Uploading transcript: {transcript_file}")
+                upload_files.append(transcript_file)
+
+            timeline_file = find_latest_file("data/transcripts/timeline_*.txt")
+            if timeline_file:
+                print(f"📊 Uploading timeline: {timeline_file}")
+                upload_files.append(timeline_file)
+
+            # Upload to R2 concurrently (independent I/O-bound requests); each
+            # file's log is printed as one block once its upload finishes
+            with ThreadPoolExecutor(max_workers=len(upload_files)) as executor:
+                futures = {
+                    executor.submit(_upload_to_r2_with_log, path, timestamp): path
+                    for path in upload_files
+                }
+                for future in as_completed(futures):
+                    r2_url, log_lines = future.result()
+                    print("\n".join(log_lines))
+                    if futures[future] != result:
+                        continue
+                    if r2_url:
+                        write_github_output("r2_url", r2_url)
+                    else:
+                        print("⚠️  R2 upload failed or skipped, but continuing...")
+
         sys.exit(0)
         
     except Exception as e:
@@ -4,17 +4,20 @@ Twitter(X) 자동 포스팅 스크립트
 데일리 팟캐스트 생성 후 홍보 트윗을 자동으로 올립니다.
 """
 
-import glob
 import os
-import re
 import sys
 from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 import tweepy
 
+from workflow_utils import TIMELINE_RE, find_latest_file, truncate
 
-def load_topics_from_timeline(timeline_dir: str = "data/transcripts") -> Optional[List[str]]:
+
+def load_topics_from_timeline(
+    timeline_dir: str = "data/transcripts",
+    max_topics: Optional[int] = None
+) -> Optional[List[str]]:
     """
     타임라인 파일에서 토픽을 로드합니다.
     
@@ -26,25 +29,24 @@ def load_topics_from_timeline(timeline_dir: str = "data/transcripts") -> Optiona
     """
     try:
         # 가장 최근 타임라인 파일 찾기 (형식: {timestamp}_timeline_{date}.txt)
-        timeline_files = glob.glob(os.path.join(timeline_dir, "*timeline*.txt"))
-        if not timeline_files:
+        latest_file = find_latest_file(os.path.join(timeline_dir, "*timeline*.txt"))
+        if not latest_file:
             print("⚠️ 타임라인 파일을 찾을 수 없습니다")
             return None
         
-        latest_file = max(timeline_files, key=os.path.getmtime)
         print(f"📄 타임라인 파일 로드: {latest_file}")
         
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         # 타임라인에서 토픽 추출 (형식: [00:00] 토픽 제목)
         topics = []
-        for line in content.split('\n'):
-            match = re.match(r'\[[\d:]+\]\s*(.+)', line.strip())
-            if match:
-                topic = match.group(1).strip()
-                if topic:
-                    topics.append(topic)
+        with open(latest_file, 'r', encoding='utf-8', buffering=1024 * 1024) as f:
+            for line in f:
+                match = TIMELINE_RE.match(line.strip())
+                if match:
+                    topic = match.group(1).strip()
+                    if topic:
+                        topics.append(topic)
+                        if max_topics is not None and len(topics) >= max_topics:
+                            break
         
         print(f"✅ {len(topics)}개 토픽 추출 완료")
         return topics if topics else None
@@ -59,16 +61,17 @@ def create_tweet_message() -> str:
     트윗 메시지를 생성합니다.
     타임라인에서 토픽을 추출하여 포함시킵니다.
     """
-    today = datetime.now().strftime("%-m월 %-d일")
+    now = datetime.now()
+    today = now.strftime("%-m월 %-d일")
     weekday_kr = ["월", "화", "수", "목", "금", "토", "일"]
-    weekday = weekday_kr[datetime.now().weekday()]
+    weekday = weekday_kr[now.weekday()]
     
     # 웹사이트 URL (고정)
     website_url = "https://dailynewspod.com"
     hashtags = "#뉴스팟캐스트 #데일리뉴스"
     
     # 타임라인에서 토픽 로드
-    topics = load_topics_from_timeline()
+    topics = load_topics_from_timeline(max_topics=4)
     
     if topics:
         # 토픽이 있으면 포함하는 메시지
@@ -80,17 +83,16 @@ def create_tweet_message() -> str:
         
         # 토픽 추가 (글자수 내에서 최대한)
         topic_lines = []
+        used_chars = 0
         for topic in topics[:4]:  # 최대 4개
             # 토픽이 너무 길면 자르기
-            if len(topic) > 35:
-                topic = topic[:32] + "..."
-            line = f"• {topic}\n"
+            line = f"• {truncate(topic, 35)}\n"
             
-            # 글자수 체크
-            if sum(len(l) for l in topic_lines) + len(line) <= available_chars:
-                topic_lines.append(line)
-            else:
+            # 글자수 체크 (누적 길이로 비교)
+            if used_chars + len(line) > available_chars:
                 break
+            topic_lines.append(line)
+            used_chars += len(line)
         
         message = header + "".join(topic_lines) + footer
     else:
@@ -102,7 +104,7 @@ def create_tweet_message() -> str:
         ]
         
         # 날짜 기반으로 메시지 선택 (매일 다른 메시지)
-        message_index = datetime.now().day % len(messages)
+        message_index = now.day % len(messages)
         message = messages[message_index]
         
         # 웹사이트 URL 및 해시태그 추가
@@ -4,39 +4,74 @@ OneSignal 푸시 알림 스크립트
 타임라인 파일에서 토픽을 추출하여 푸시 알림에 포함시킵니다.
 """
 
-import glob
-import json
 import os
-import re
 import sys
+import uuid
 from datetime import datetime
 from typing import List, Optional
-import urllib.request
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
+from workflow_utils import TIMELINE_RE, find_latest_file, truncate
 
-def load_topics_from_timeline(timeline_dir: str = "data/transcripts") -> Optional[List[str]]:
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 사용
+    orjson = None
+    import json
+
+
+ONESIGNAL_API_URL = "https://onesignal.com/api/v1/notifications"
+
+# 연결 재사용 + 일시적인 OneSignal 오류(429/5xx) 재시도
+session = requests.Session()
+session.mount("https://", HTTPAdapter(max_retries=Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=[429, 502, 503, 504],
+    allowed_methods=frozenset({"POST"}),
+    raise_on_status=False,
+)))
+
+
+def _json_dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json_loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_topics_from_timeline(
+    timeline_dir: str = "data/transcripts",
+    max_topics: Optional[int] = None
+) -> Optional[List[str]]:
     """
     타임라인 파일에서 토픽을 로드합니다.
     """
     try:
-        timeline_files = glob.glob(os.path.join(timeline_dir, "*timeline*.txt"))
-        if not timeline_files:
+        latest_file = find_latest_file(os.path.join(timeline_dir, "*timeline*.txt"))
+        if not latest_file:
             print("⚠️ 타임라인 파일을 찾을 수 없습니다")
             return None
         
-        latest_file = max(timeline_files, key=os.path.getmtime)
         print(f"📄 타임라인 파일: {latest_file}")
         
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         topics = []
-        for line in content.split('\n'):
-            match = re.match(r'\[[\d:]+\]\s*(.+)', line.strip())
-            if match:
-                topic = match.group(1).strip()
-                if topic:
-                    topics.append(topic)
+        with open(latest_file, 'r', encoding='utf-8', buffering=1024 * 1024) as f:
+            for line in f:
+                match = TIMELINE_RE.match(line.strip())
+                if match:
+                    topic = match.group(1).strip()
+                    if topic:
+                        topics.append(topic)
+                        if max_topics is not None and len(topics) >= max_topics:
+                            break
         
         return topics if topics else None
         
@@ -54,7 +89,7 @@ def create_notification_content() -> tuple[str, str]:
     """
     today = datetime.now().strftime("%-m월 %-d일")
     
-    topics = load_topics_from_timeline()
+    topics = load_topics_from_timeline(max_topics=3)
     
     heading = f"{today} 뉴스가 도착했어요"
     
@@ -62,9 +97,7 @@ def create_notification_content() -> tuple[str, str]:
         # 토픽 최대 3개, 각 20자 제한 (푸시 알림은 짧아야 함)
         topic_lines = []
         for topic in topics[:3]:
-            if len(topic) > 20:
-                topic = topic[:17] + "..."
-            topic_lines.append(f"• {topic}")
+            topic_lines.append(f"• {truncate(topic, 20)}")
         
         content = "\n".join(topic_lines)
     else:
@@ -99,7 +132,9 @@ def send_push_notification():
         "included_segments": ["All"],
         "headings": {"ko": heading, "en": heading},
         "contents": {"ko": content, "en": content},
-        "url": "https://dailynewspod.com"
+        "url": "https://dailynewspod.com",
+        # 재시도 시 중복 발송 방지
+        "idempotency_key": str(uuid.uuid4())
     }
     
     headers = {
@@ -108,26 +143,24 @@ def send_push_notification():
     }
     
     try:
-        data = json.dumps(payload).encode('utf-8')
-        req = urllib.request.Request(
-            "https://onesignal.com/api/v1/notifications",
-            data=data,
+        response = session.post(
+            ONESIGNAL_API_URL,
+            data=_json_dumps(payload),
             headers=headers,
-            method="POST"
+            timeout=10
         )
         
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode('utf-8'))
+        if response.ok:
+            result = _json_loads(response.content)
             print(f"✅ 푸시 알림 전송 성공!")
             print(f"   ID: {result.get('id', 'N/A')}")
             print(f"   수신자: {result.get('recipients', 'N/A')}명")
+        else:
+            print(f"⚠️ 푸시 알림 전송 실패: {response.status_code}")
+            print(f"   에러: {response.text}")
+            print("⚠️ 워크플로우는 계속 진행됩니다")
+            # sys.exit(0) - 실패해도 워크플로우 계속
             
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8')
-        print(f"⚠️ 푸시 알림 전송 실패: {e.code}")
-        print(f"   에러: {error_body}")
-        print("⚠️ 워크플로우는 계속 진행됩니다")
-        # sys.exit(0) - 실패해도 워크플로우 계속
     except Exception as e:
         print(f"⚠️ 푸시 알림 전송 실패: {e}")
         print("⚠️ 워크플로우는 계속 진행됩니다")
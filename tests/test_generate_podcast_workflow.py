@@ -0,0 +1,87 @@
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+from botocore.stub import Stubber
+
+import generate_podcast_workflow as workflow
+
+BUCKET = "daily-podcast"
+FILE_KEY = "42_podcast.mp3"
+FILE_SIZE = workflow.R2_SINGLE_PUT_MAX_SIZE
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    # Sparse file just over the put_object cutoff, so the HEAD check runs
+    path = tmp_path / "podcast.mp3"
+    with open(path, "wb") as f:
+        f.truncate(FILE_SIZE)
+    return str(path)
+
+
+@pytest.fixture
+def r2_client(monkeypatch):
+    monkeypatch.setenv("R2_DEV_SUBDOMAIN", "https://x.r2.dev")
+    client = boto3.session.Session().client(
+        "s3",
+        endpoint_url=workflow.R2_ENDPOINT_URL,
+        region_name="auto",
+        aws_access_key_id="id",
+        aws_secret_access_key="secret",
+    )
+    uploads = []
+    monkeypatch.setattr(
+        client, "upload_file", lambda *args, **kwargs: uploads.append(args)
+    )
+    monkeypatch.setattr(workflow, "_get_r2_client", lambda endpoint_url: client)
+    with Stubber(client) as stubber:
+        yield client, stubber, uploads
+
+
+def test_upload_to_r2_uploads_when_object_is_missing(r2_client, large_file, capsys):
+    client, stubber, uploads = r2_client
+    stubber.add_client_error("head_object", service_error_code="404")
+
+    url = workflow.upload_to_r2(large_file, timestamp="42")
+
+    assert url == f"https://x.r2.dev/{FILE_KEY}"
+    assert uploads == [(large_file, BUCKET, FILE_KEY)]
+    assert "Successfully uploaded" in capsys.readouterr().out
+
+
+def test_upload_to_r2_skips_same_size_object(r2_client, large_file, capsys):
+    client, stubber, uploads = r2_client
+    stubber.add_response(
+        "head_object",
+        {"ContentLength": FILE_SIZE},
+        {"Bucket": BUCKET, "Key": FILE_KEY},
+    )
+
+    url = workflow.upload_to_r2(large_file, timestamp="42")
+
+    out = capsys.readouterr().out
+    assert url == f"https://x.r2.dev/{FILE_KEY}"
+    assert uploads == []
+    assert "skipping upload" in out
+    assert "Successfully uploaded" not in out
+
+
+def test_upload_to_r2_uploads_when_head_check_fails(r2_client, large_file):
+    client, stubber, uploads = r2_client
+    stubber.add_client_error("head_object", service_error_code="AccessDenied")
+
+    url = workflow.upload_to_r2(large_file, timestamp="42")
+
+    assert url == f"https://x.r2.dev/{FILE_KEY}"
+    assert uploads == [(large_file, BUCKET, FILE_KEY)]
+
+
+def test_upload_to_r2_with_log_collects_lines(r2_client, large_file, capsys):
+    client, stubber, uploads = r2_client
+    stubber.add_client_error("head_object", service_error_code="404")
+
+    url, lines = workflow._upload_to_r2_with_log(large_file, "42")
+
+    assert url == f"https://x.r2.dev/{FILE_KEY}"
+    assert f"📎 Public URL: {url}" in lines
+    assert capsys.readouterr().out == ""
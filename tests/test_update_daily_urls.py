@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from update_daily_urls import (
+    AUTO_UPDATE_COMMENT,
+    parse_headline_urls,
+    update_daily_urls_file,
+)
+
+NEW_URLS = ["https://n/article/9", "https://n/article/8"]
+EXPECTED_TAIL = f"{AUTO_UPDATE_COMMENT}\nhttps://n/article/9,https://n/article/8\n"
+
+SAMPLE_SECTION_HTML = """<html><body>
+<div class="other"><a href="/article/999/1">not headline</a></div>
+<ul>
+<li class="sa_item _SECTION_HEADLINE is_blind"><div><a href="https://n.news.naver.com/mnews/article/001/0001#c">thumb</a></div></li>
+<li class="sa_item   _SECTION_HEADLINE"><div><a href="/mnews/article/002/0002">두번째</a></div></li>
+<li class="_SECTION_HEADLINE sa_item"><div><a href="https://n.news.naver.com/mnews/article/001/0001">dup</a></div></li>
+<li class="sa_item _SECTION_HEADLINE"><div><a href="https://n.news.naver.com/mnews/hotissue/3">not article</a></div></li>
+<li class="sa_item _SECTION_HEADLINE"><div><a href="mnews/article/004/0004">rel</a></div></li>
+<li class="sa_item"><div><a href="/mnews/article/005/0005">plain sa_item</a></div></li>
+</ul></body></html>"""
+
+
+@pytest.mark.parametrize(
+    "original, expected",
+    [
+        (
+            "# 예제 URL\n# https://example.com/article1\n\n"
+            f"{AUTO_UPDATE_COMMENT}\nhttps://old/1,https://old/2\n",
+            f"# 예제 URL\n# https://example.com/article1\n\n{EXPECTED_TAIL}",
+        ),
+        (
+            "# c\nfoo bar\n  https://x/y\n# last",
+            f"# c\nfoo bar\n# last\n{EXPECTED_TAIL}",
+        ),
+        ("\n\n\n", EXPECTED_TAIL),
+        ("", EXPECTED_TAIL),
+        ("foo https://x\n", f"foo https://x\n\n{EXPECTED_TAIL}"),
+    ],
+    ids=["template", "no-trailing-newline", "blank-lines", "empty", "inline-url-kept"],
+)
+def test_update_daily_urls_file(tmp_path, original, expected):
+    path = tmp_path / "daily_urls.txt"
+    path.write_text(original, encoding="utf-8")
+
+    update_daily_urls_file(NEW_URLS, str(path))
+
+    assert path.read_text(encoding="utf-8") == expected
+
+
+def test_update_daily_urls_file_missing_file(tmp_path):
+    path = tmp_path / "urls" / "daily_urls.txt"
+
+    update_daily_urls_file(["https://n/article/9"], str(path))
+
+    assert (
+        path.read_text(encoding="utf-8")
+        == f"{AUTO_UPDATE_COMMENT}\nhttps://n/article/9\n"
+    )
+
+
+def test_update_daily_urls_file_unchanged_leaves_mtime(tmp_path):
+    path = tmp_path / "daily_urls.txt"
+    update_daily_urls_file(NEW_URLS, str(path))
+    os.utime(path, (1_000_000, 1_000_000))
+
+    update_daily_urls_file(NEW_URLS, str(path))
+
+    assert path.stat().st_mtime == 1_000_000
+    assert path.read_text(encoding="utf-8") == EXPECTED_TAIL
+
+
+def test_parse_headline_urls():
+    urls = parse_headline_urls(SAMPLE_SECTION_HTML.encode("utf-8"), max_urls=5)
+
+    assert urls == [
+        "https://n.news.naver.com/mnews/article/001/0001",
+        "https://news.naver.com/mnews/article/002/0002",
+        "https://news.naver.com/mnews/article/004/0004",
+    ]
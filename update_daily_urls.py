@@ -3,109 +3,452 @@
 Update daily_urls.txt with latest headlines from Naver News Economy section
 Extracts links from elements with class "sa_item _SECTION_HEADLINE"
 """
+import atexit
+import datetime
+import hashlib
+import importlib.util
+import json
+import logging
 import os
+import re
+import shutil
 import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
-from bs4 import BeautifulSoup
-from playwright.sync_api import sync_playwright
+from typing import List, Optional, Union
+import httpx
+import lxml.html
+from lxml import etree
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError, sync_playwright
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
 
-def extract_headline_urls(url: str, max_urls: int = 5) -> List[str]:
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+ACCEPT_LANGUAGE = "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7"
+HEADLINE_LINK_SELECTOR = ".sa_item._SECTION_HEADLINE a[href]"
+HEADLINE_XPATH = etree.XPath(
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' sa_item ')"
+    " and contains(concat(' ', normalize-space(@class), ' '), ' _SECTION_HEADLINE ')]"
+)
+FIRST_LINK_XPATH = etree.XPath("(.//a[@href])[1]")
+ARTICLE_PATH_RE = re.compile(r'/article/')
+# Resource types the Playwright fallback never needs to load
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font", "stylesheet"})
+# Chromium flags that cut startup and per-page overhead on CI runners
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-background-networking",
+    "--disable-sync",
+    "--metrics-recording-only",
+    "--mute-audio",
+]
+AUTO_UPDATE_COMMENT = "# Auto-updated URLs from Naver News Economy section"
+# Lines rewritten on every update: URL lines and the auto-update comment
+URL_OR_AUTO_COMMENT_LINE_RE = re.compile(
+    rf'^\s*(?:https?://|{re.escape(AUTO_UPDATE_COMMENT)})'
+)
+# URL lines only (what read_existing_urls returns)
+URL_LINE_RE = re.compile(r'^\s*https?://')
+# Cookies/local storage persisted between runs for the Playwright fallback
+PLAYWRIGHT_STATE_PATH = Path("data/.playwright_state.json")
+# On-disk cache of extracted headline URLs (per section URL and day)
+CACHE_DIR = Path(".cache")
+CACHE_TTL_SECONDS = 3600
+# Maximum number of browser contexts kept in the Playwright pool
+MAX_CONTEXTS = 4
+
+# Reused HTTP client (keep-alive; HTTP/2 when the h2 package is installed)
+http_client = httpx.Client(
+    http2=importlib.util.find_spec("h2") is not None,
+    headers={
+        "User-Agent": USER_AGENT,
+        "Accept-Language": ACCEPT_LANGUAGE,
+    },
+    timeout=10.0,
+    follow_redirects=True,
+    limits=httpx.Limits(max_keepalive_connections=10),
+)
+
+
+def _block_heavy_resources(route):
+    """Playwright route handler that aborts requests for BLOCKED_RESOURCE_TYPES."""
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        route.abort()
+    else:
+        route.continue_()
+
+
+class _BrowserPool:
     """
-    Extract headline URLs from Naver News section page.
+    Single headless Chromium instance with a small pool of reusable contexts.
+    
+    The browser is launched lazily on first use and kept alive until
+    shutdown(), so repeated Playwright fetches don't pay the launch cost.
+    """
+    
+    def __init__(self, max_contexts: int = MAX_CONTEXTS):
+        self.max_contexts = max_contexts
+        self._playwright = None
+        self._browser = None
+        self._idle_contexts = []
+        self._num_contexts = 0
+    
+    def _get_browser(self):
+        if self._browser is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        return self._browser
+    
+    def acquire(self):
+        """Return an idle context, creating one if the pool isn't full."""
+        if self._idle_contexts:
+            return self._idle_contexts.pop()
+        if self._num_contexts >= self.max_contexts:
+            raise RuntimeError(f"All {self.max_contexts} browser contexts are in use")
+        # Start from the cookies saved by the previous run, if any
+        storage_state = PLAYWRIGHT_STATE_PATH if PLAYWRIGHT_STATE_PATH.exists() else None
+        context = self._get_browser().new_context(
+            user_agent=USER_AGENT,
+            ignore_https_errors=True,
+            extra_http_headers={"Accept-Language": ACCEPT_LANGUAGE},
+            storage_state=storage_state,
+        )
+        # Headlines are in the HTML; don't download images, fonts, media or CSS
+        context.route("**/*", _block_heavy_resources)
+        self._num_contexts += 1
+        return context
+    
+    def release(self, context):
+        """Return a context to the pool for reuse."""
+        self._idle_contexts.append(context)
+    
+    def discard(self, context):
+        """Close a context that may be broken and free its slot instead of reusing it."""
+        self._num_contexts -= 1
+        try:
+            context.close()
+        except Exception as e:
+            print(f"⚠️  Could not close Playwright context: {str(e)}")
+    
+    def shutdown(self):
+        """Save cookies, then close all contexts, the browser and the Playwright driver."""
+        if self._idle_contexts:
+            try:
+                PLAYWRIGHT_STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+                self._idle_contexts[-1].storage_state(path=PLAYWRIGHT_STATE_PATH)
+            except Exception as e:
+                print(f"⚠️  Could not save Playwright storage state: {str(e)}")
+        # Each step is guarded so one failure doesn't leak the rest (or raise from atexit)
+        for context in self._idle_contexts:
+            try:
+                context.close()
+            except Exception as e:
+                print(f"⚠️  Could not close Playwright context: {str(e)}")
+        self._idle_contexts.clear()
+        self._num_contexts = 0
+        if self._browser is not None:
+            try:
+                self._browser.close()
+            except Exception as e:
+                print(f"⚠️  Could not close browser: {str(e)}")
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                self._playwright.stop()
+            except Exception as e:
+                print(f"⚠️  Could not stop Playwright: {str(e)}")
+            self._playwright = None
+
+
+browser_pool = _BrowserPool()
+atexit.register(browser_pool.shutdown)
+
+
+def fetch_html_with_playwright(url: str) -> str:
+    """
+    Fetch a page with headless Chromium (for JavaScript-rendered content).
     
     Args:
-        url: The Naver News section URL
+        url: The page URL
+    
+    Returns:
+        Rendered HTML content
+    """
+    context = browser_pool.acquire()
+    try:
+        page = context.new_page()
+    except Exception:
+        # The context (or the whole browser) is likely dead; don't pool it
+        browser_pool.discard(context)
+        raise
+    try:
+        page.goto(url, wait_until="domcontentloaded", timeout=15000)
+        # Return as soon as the first headline link exists instead of sleeping
+        try:
+            page.locator(HEADLINE_LINK_SELECTOR).first.wait_for(timeout=5000)
+        except PlaywrightTimeoutError:
+            print("⚠️  Headline elements did not appear within 5s")
+        
+        return page.content()
+    finally:
+        try:
+            page.close()
+        except Exception as e:
+            print(f"⚠️  Could not close Playwright page: {str(e)}")
+            browser_pool.discard(context)
+        else:
+            browser_pool.release(context)
+
+
+def parse_headline_urls(html_content: Union[str, bytes], max_urls: int = 5) -> List[str]:
+    """
+    Parse headline article URLs out of a Naver News section page.
+    
+    Args:
+        html_content: HTML of the section page (raw bytes let lxml honour the
+            page's own encoding declaration)
         max_urls: Maximum number of URLs to extract (default: 5)
     
     Returns:
         List of article URLs
     """
     urls = []
+    seen = set()
+    
+    if not html_content.strip():
+        return urls
+    
+    # Select "sa_item _SECTION_HEADLINE" elements with a precompiled XPath
+    tree = lxml.html.fromstring(html_content)
+    headline_elements = HEADLINE_XPATH(tree)
+    
+    # Progress lines are collected and written once after the loop
+    log_lines = [f"📰 Found {len(headline_elements)} headline elements"]
+    
+    # Extract links from each headline element
+    for element in headline_elements[:max_urls]:
+        # Find the first <a href> within the element
+        link_tags = FIRST_LINK_XPATH(element)
+        if link_tags:
+            href = (link_tags[0].get('href') or '').strip()
+            if href:
+                # Convert relative URLs to absolute
+                if href.startswith('/'):
+                    href = f"https://news.naver.com{href}"
+                elif not href.startswith('http'):
+                    href = f"https://news.naver.com/{href}"
+                
+                # Normalize URL (remove fragments, ensure proper format)
+                href = href.partition('#')[0]
+                
+                # Only add if it's a valid article URL and not already in list
+                if href not in seen and ARTICLE_PATH_RE.search(href):
+                    seen.add(href)
+                    urls.append(href)
+                    log_lines.append(f"  ✓ {href}")
+    
+    sys.stdout.write("\n".join(log_lines) + "\n")
+    sys.stdout.flush()
     
+    return urls
+
+
+def fetch_static_html(url: str) -> Optional[bytes]:
+    """
+    Fetch the static HTML of a page over the shared HTTP client (no browser).
+    
+    Args:
+        url: The page URL
+    
+    Returns:
+        Raw HTML bytes, or None if the request failed
+    """
+    print(f"🌐 Fetching: {url}")
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=True)
-            context = browser.new_context(
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                ignore_https_errors=True,
-            )
-            page = context.new_page()
-            page.set_extra_http_headers({
-                "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-            })
-            
-            print(f"🌐 Fetching: {url}")
-            page.goto(url, wait_until="networkidle", timeout=30000)
-            # Wait a bit for dynamic content to load
-            page.wait_for_timeout(2000)
-            
-            html_content = page.content()
-            context.close()
-            browser.close()
-            
-            # Parse HTML with BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
-            
-            # Find all elements with class "sa_item _SECTION_HEADLINE"
-            # Handle both string and list class attributes
-            def has_headline_class(class_list):
-                if not class_list:
-                    return False
-                if isinstance(class_list, str):
-                    return 'sa_item' in class_list and '_SECTION_HEADLINE' in class_list
-                if isinstance(class_list, list):
-                    classes = ' '.join(class_list)
-                    return 'sa_item' in classes and '_SECTION_HEADLINE' in classes
-                return False
-            
-            headline_elements = soup.find_all(class_=has_headline_class)
-            
-            # Alternative: Try finding by both classes separately
-            if not headline_elements:
-                headline_elements = soup.find_all(class_='sa_item')
-                headline_elements = [el for el in headline_elements if '_SECTION_HEADLINE' in ' '.join(el.get('class', []))]
-            
-            print(f"📰 Found {len(headline_elements)} headline elements")
+        response = http_client.get(url)
+        response.raise_for_status()
+    # Any failure here (bad URL, TLS, HTTP status) just means "use the fallback"
+    except Exception as e:
+        print(f"⚠️  HTTP fetch failed: {str(e)}")
+        return None
+    return response.content
+
+
+def _cache_path(url: str, max_urls: int) -> Path:
+    """Cache file for a section URL, keyed by URL hash, max_urls and today's date."""
+    url_hash = hashlib.sha1(url.encode()).hexdigest()
+    cache_key = f"{url_hash}-{max_urls}-{datetime.date.today().isoformat()}"
+    return CACHE_DIR / f"{cache_key}.json"
+
+
+def load_cached_headline_urls(url: str, max_urls: int) -> Optional[List[str]]:
+    """
+    Load headline URLs extracted earlier today for this section, if still fresh.
+    
+    Args:
+        url: The Naver News section URL
+        max_urls: Maximum number of URLs the cached extraction was run with
+    
+    Returns:
+        Cached list of article URLs, or None on a cache miss
+    """
+    cache_path = _cache_path(url, max_urls)
+    try:
+        if time.time() - cache_path.stat().st_mtime >= CACHE_TTL_SECONDS:
+            return None
+        data = cache_path.read_bytes()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_headline_urls(url: str, max_urls: int, urls: List[str]):
+    """
+    Atomically write extracted headline URLs to the cache.
+    
+    Args:
+        url: The Naver News section URL
+        max_urls: Maximum number of URLs the extraction was run with
+        urls: Extracted article URLs
+    """
+    cache_path = _cache_path(url, max_urls)
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = cache_path.with_suffix('.tmp')
+        if orjson is not None:
+            tmp_path.write_bytes(orjson.dumps(urls))
+        else:
+            tmp_path.write_bytes(json.dumps(urls, ensure_ascii=False).encode('utf-8'))
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"⚠️  Could not write cache {cache_path}: {str(e)}")
+
+
+def extract_headline_urls_batch(
+    section_urls: List[str],
+    max_urls: int = 5,
+    max_concurrency: int = 5
+) -> List[List[str]]:
+    """
+    Extract headline URLs from several Naver News section pages.
+    
+    Results are cached on disk per section and day (for up to
+    CACHE_TTL_SECONDS), so re-runs skip the network. Uncached pages are
+    fetched concurrently over the shared HTTP client. Sections with no
+    headlines in their static HTML are then retried one at a time with
+    Playwright, since the sync Playwright API must stay on a single thread.
+    
+    Args:
+        section_urls: Naver News section URLs
+        max_urls: Maximum number of URLs to extract per section (default: 5)
+        max_concurrency: Maximum number of concurrent HTTP fetches (default: 5)
+    
+    Returns:
+        One list of article URLs per section, in the same order as section_urls
+    """
+    results: List[List[str]] = [[] for _ in section_urls]
+    if not section_urls:
+        return results
+    
+    # Sections extracted earlier today (e.g. a re-run) come from the cache
+    pending = []
+    for i, url in enumerate(section_urls):
+        cached_urls = load_cached_headline_urls(url, max_urls)
+        if cached_urls:
+            print(f"💾 Using cached headline URLs for {url}")
+            results[i] = cached_urls
+        else:
+            pending.append(i)
+    if not pending:
+        return results
+    
+    # Fetch remaining sections concurrently; parsing stays on this thread
+    with ThreadPoolExecutor(max_workers=min(max_concurrency, len(pending))) as executor:
+        static_pages = list(executor.map(fetch_static_html, [section_urls[i] for i in pending]))
+    
+    for i, html_content in zip(pending, static_pages):
+        url = section_urls[i]
+        try:
+            if html_content:
+                try:
+                    results[i] = parse_headline_urls(html_content, max_urls=max_urls)
+                except Exception as e:
+                    # e.g. an empty document; treat as "no headlines" so the fallback runs
+                    print(f"⚠️  Could not parse static HTML: {str(e)}")
             
-            # Extract links from each headline element
-            for element in headline_elements[:max_urls]:
-                # Find <a> tag within the element
-                link_tag = element.find('a', href=True)
-                if link_tag:
-                    href = link_tag.get('href', '').strip()
-                    if href:
-                        # Convert relative URLs to absolute
-                        if href.startswith('/'):
-                            href = f"https://news.naver.com{href}"
-                        elif not href.startswith('http'):
-                            href = f"https://news.naver.com/{href}"
-                        
-                        # Normalize URL (remove fragments, ensure proper format)
-                        if '#' in href:
-                            href = href.split('#')[0]
-                        
-                        # Only add if it's a valid article URL and not already in list
-                        if 'article' in href and href not in urls:
-                            urls.append(href)
-                            print(f"  ✓ {href}")
+            if not results[i]:
+                # Headlines may be rendered by JavaScript; retry with a real browser
+                print(f"🌐 Falling back to Playwright: {url}")
+                html_content = fetch_html_with_playwright(url)
+                results[i] = parse_headline_urls(html_content, max_urls=max_urls)
             
-            print(f"✅ Extracted {len(urls)} article URLs")
+            print(f"✅ Extracted {len(results[i])} article URLs from {url}")
+            if results[i]:
+                save_cached_headline_urls(url, max_urls, results[i])
             
-    except Exception as e:
-        print(f"❌ Error extracting URLs: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return []
+        except Exception:
+            logger.exception("❌ Error extracting URLs from %s", url)
+            results[i] = []
     
-    return urls
+    return results
+
+
+def extract_headline_urls(url: str, max_urls: int = 5) -> List[str]:
+    """
+    Extract headline URLs from Naver News section page.
+    
+    Fetches the page with a plain HTTP request first and only falls back to
+    a headless browser when no headlines are found in the static HTML.
+    
+    Args:
+        url: The Naver News section URL
+        max_urls: Maximum number of URLs to extract (default: 5)
+    
+    Returns:
+        List of article URLs
+    """
+    return extract_headline_urls_batch([url], max_urls=max_urls)[0]
+
+
+def read_existing_urls(file_path: Path) -> List[str]:
+    """
+    Read the URLs currently listed in a daily_urls.txt file.
+    
+    Args:
+        file_path: Path to the daily_urls.txt file
+    
+    Returns:
+        URLs in file order (empty if the file doesn't exist)
+    """
+    existing_urls = []
+    if not file_path.exists():
+        return existing_urls
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if URL_LINE_RE.match(line):
+                existing_urls.extend(u.strip() for u in line.split(',') if u.strip())
+    return existing_urls
 
 
 def update_daily_urls_file(urls: List[str], filepath: str = "data/urls/daily_urls.txt"):
     """
     Update daily_urls.txt file with new URLs, removing existing URL lines.
     
+    The file is first read once to compare its URLs with the new ones, and
+    left untouched if they match. Only when they differ is it read a second
+    time for the streaming rewrite.
+    
     Args:
         urls: List of URLs to write
         filepath: Path to the daily_urls.txt file
@@ -118,50 +461,53 @@ def update_daily_urls_file(urls: List[str], filepath: str = "data/urls/daily_url
     file_path = Path(filepath)
     file_path.parent.mkdir(parents=True, exist_ok=True)
     
-    # Read existing file to preserve comments
-    existing_content = []
-    if file_path.exists():
-        with open(file_path, 'r', encoding='utf-8') as f:
-            existing_content = f.readlines()
-    
-    # Filter out existing URL lines and the auto-update comment
-    # Keep only original comments and empty lines
-    filtered_content = []
-    for line in existing_content:
-        line_stripped = line.strip()
-        # Skip the auto-update comment line (we'll add it fresh)
-        if 'Auto-updated URLs from Naver News Economy section' in line_stripped:
-            continue
-        # Keep original comments and empty lines
-        elif not line_stripped or line_stripped.startswith('#'):
-            filtered_content.append(line)
-        # Skip lines that contain URLs (http:// or https://)
-        elif 'http://' in line_stripped or 'https://' in line_stripped:
-            continue  # Remove existing URL lines
-        else:
-            # Keep other non-URL lines (if any)
-            filtered_content.append(line)
-    
-    # Prepare new content
-    new_content = filtered_content
-    
-    # Add separator comment and newline if needed
-    # Remove trailing empty lines first
-    while new_content and not new_content[-1].strip():
-        new_content.pop()
-    
-    # Add newline and comment
-    if new_content:
-        new_content.append("\n")
-    new_content.append("# Auto-updated URLs from Naver News Economy section\n")
-    
-    # Add URLs (comma-separated on a single line)
-    url_line = ','.join(urls)
-    new_content.append(f"{url_line}\n")
+    # Leave the file untouched if it already lists exactly these URLs
+    if read_existing_urls(file_path) == urls:
+        print(f"✅ {filepath} already up to date ({len(urls)} URL(s)), no changes")
+        return
     
-    # Write to file
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.writelines(new_content)
+    # Stream the existing file into a temp file in the same directory,
+    # keeping comments and non-URL lines, then atomically swap it in
+    tmp_file = tempfile.NamedTemporaryFile(
+        'w', encoding='utf-8', dir=file_path.parent, suffix='.tmp', delete=False
+    )
+    try:
+        with tmp_file as out:
+            wrote_content = False
+            # Blank lines are held back until a non-blank line follows,
+            # which drops trailing empty lines without a second pass
+            pending_blanks = []
+            if file_path.exists():
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        if not line.strip():
+                            pending_blanks.append(line)
+                            continue
+                        # Skip existing URL lines and the auto-update comment (we'll add it fresh)
+                        if URL_OR_AUTO_COMMENT_LINE_RE.match(line):
+                            continue
+                        # Keep comments and other non-URL lines
+                        out.writelines(pending_blanks)
+                        pending_blanks.clear()
+                        out.write(line)
+                        wrote_content = True
+            
+            # Add newline and comment
+            if wrote_content:
+                out.write("\n")
+            out.write(f"{AUTO_UPDATE_COMMENT}\n")
+            
+            # Add URLs (comma-separated on a single line)
+            out.write(f"{','.join(urls)}\n")
+        
+        if file_path.exists():
+            shutil.copymode(file_path, tmp_file.name)
+        else:
+            os.chmod(tmp_file.name, 0o644)
+        os.replace(tmp_file.name, file_path)
+    except BaseException:
+        os.unlink(tmp_file.name)
+        raise
     
     print(f"✅ Updated {filepath} with {len(urls)} URL(s) (removed existing URLs)")
 
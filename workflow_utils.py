@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the GitHub Actions workflow scripts
+(generate_podcast_workflow.py, post_to_twitter.py, send_push_notification.py)
+"""
+import fnmatch
+import os
+import re
+from typing import Optional
+
+# Timeline line format: [00:00] topic title
+TIMELINE_RE = re.compile(r'\[[\d:]+\]\s*(.+)')
+
+
+def find_latest_file(pattern: str, contains: Optional[str] = None) -> Optional[str]:
+    """
+    Find the most recently modified file matching the pattern.
+
+    Args:
+        pattern: Glob pattern of the form "<directory>/<filename pattern>"
+        contains: Optional substring the filename must also contain
+
+    Returns:
+        Path of the newest matching file, or None if there is none
+        (including when the directory does not exist)
+    """
+    dirpath, name_pattern = os.path.split(pattern)
+    latest_file = None
+    latest_mtime = -1.0
+    try:
+        # Single directory pass; each candidate is stat'd exactly once
+        with os.scandir(dirpath or '.') as entries:
+            for entry in entries:
+                if not fnmatch.fnmatch(entry.name, name_pattern):
+                    continue
+                if contains and contains not in entry.name:
+                    continue
+                if not entry.is_file():
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime > latest_mtime:
+                    latest_mtime = mtime
+                    latest_file = entry.path
+    except FileNotFoundError:
+        return None
+    return latest_file
+
+
+def truncate(text: str, max_len: int) -> str:
+    """Cut text to max_len characters, ending with "..." when it was shortened."""
+    return text if len(text) <= max_len else f"{text[:max_len - 3]}..."